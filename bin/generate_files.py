@@ -1,15 +1,40 @@
 #!/usr/bin/env python3
 """
 Generate example audio, video, image, and compressed files for the ETL example project.
-Requires: ffmpeg, zip, gzip, and optionally pdftk or similar for PDF generation
+Requires: ffmpeg and optionally pdftk or similar for PDF generation
+Optional: Pillow, to generate raster images in-process instead of with ffmpeg
+Optional: PyNvVideoCodec and NumPy, to encode MP4/MOV/MKV video with NVENC on CUDA hosts
 """
 
+import argparse
+import asyncio
+import functools
+import gzip
+import io
 import os
 import shutil
+import struct
 import subprocess
 import sys
+import tarfile
+import tempfile
+import time
+import zipfile
 from pathlib import Path
 
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow is optional; raster images fall back to ffmpeg without it
+    Image = None
+
+try:
+    import numpy as np
+    import PyNvVideoCodec as nvc
+except ImportError:
+    # PyNvVideoCodec is optional; without it all video goes through ffmpeg
+    nvc = None
+
 # Get the project root directory (parent of bin/)
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -26,34 +51,273 @@ VIDEO_DIR.mkdir(exist_ok=True)
 IMAGES_DIR.mkdir(exist_ok=True)
 OTHER_DIR.mkdir(exist_ok=True)
 
+# ffmpeg commands generating the lavfi sources the example files are encoded from
+# A simple sine wave tone: 2 seconds, 440Hz (A note), sample rate 44100
+AUDIO_BASE_CMD = ("ffmpeg", "-f", "lavfi", "-i", "sine=frequency=440:duration=2", "-y")
+# A simple test pattern video: 5 seconds, 640x480, 30fps
+VIDEO_BASE_CMD = ("ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=5:size=640x480:rate=30", "-y")
+# A test pattern image: 640x480, RGB
+IMAGE_BASE_CMD = ("ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=1:size=640x480:rate=1", "-y")
+
+# Minimal MIDI file, written once and linked to its other extensions
+MIDI_CONTENT = bytes([
+    0x4D, 0x54, 0x68, 0x64, 0x00, 0x00, 0x00, 0x06,  # MIDI header
+    0x00, 0x01, 0x00, 0x01, 0x00, 0x60,  # Format 1, 1 track, 96 ticks/quarter
+    0x4D, 0x54, 0x72, 0x6B, 0x00, 0x00, 0x00, 0x0B,  # Track header
+    0x00, 0xFF, 0x51, 0x03, 0x07, 0xA1, 0x20,  # Set tempo
+    0x00, 0x90, 0x3C, 0x60,  # Note on (middle C)
+    0x60, 0x80, 0x3C, 0x00,  # Note off
+    0x00, 0xFF, 0x2F, 0x00   # End of track
+])
+
+# Minimal WASM file (empty module)
+WASM_CONTENT = bytes([
+    0x00, 0x61, 0x73, 0x6D,  # WASM magic number
+    0x01, 0x00, 0x00, 0x00,  # Version 1
+])
+
+# Simple binary content for .bin and placeholder files
+BINARY_CONTENT = bytes(range(256)) * 10  # 2560 bytes
+
+# Outputs modified after this script are up to date and are not regenerated
+SCRIPT_MTIME = Path(__file__).stat().st_mtime
+
+# H.264 encoders in order of preference; libx264 is the software fallback
+H264_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_vaapi", "libx264"]
+VAAPI_DEVICE = "/dev/dri/renderD128"
+
+# ffmpeg threads per encode while encodes run in parallel, since the
+# parallel encodes already keep every core busy
+THREADS_PER_JOB = 1
+
+# Video outputs PyNvVideoCodec can produce, with the container to mux each into
+NVC_VIDEO_FORMATS = {
+    "example.mp4": "mp4",
+    "example.mov": "mov",
+    "example.mkv": "matroska",
+}
+
+# Fastest settings for software encoders; the fixtures only need to be valid
+FAST_ENCODER_ARGS = {
+    "libx264": ["-preset", "ultrafast", "-tune", "zerolatency"],
+    "libx265": ["-preset", "ultrafast", "-tune", "zerolatency"],
+    "libvpx-vp9": ["-deadline", "realtime", "-cpu-used", "8"],
+    "libopus": ["-compression_level", "0"],
+}
+
+def is_stale(path, force=False):
+    """Check if an output is missing or older than this script"""
+    return force or not path.exists() or path.stat().st_mtime <= SCRIPT_MTIME
+
+@functools.lru_cache(maxsize=None)
 def check_command(cmd):
     """Check if a command is available"""
-    # First check if command exists in PATH
-    if shutil.which(cmd) is None:
-        return False
-    # Some commands (like ffmpeg) return non-zero exit codes even for --version
-    # So we check if the command exists and can be executed, not the exit code
+    # Presence in PATH is enough; probing with --version would cost a
+    # fork/exec per check for no extra information
+    return shutil.which(cmd) is not None
+
+def discard_outputs(paths):
+    """Remove whatever a failed or interrupted encode left at its output paths
+
+    A partial file is newer than this script, so is_stale() would otherwise
+    take it as up to date on the next run.
+    """
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+def _succeeds(argv):
+    """Run a command with its output discarded, returning whether it succeeded"""
+    return subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+def _run(argv):
+    """Run a command with its output discarded, raising CalledProcessError on failure"""
+    # ffmpeg is chatty on stderr, so only capture it when there is an error
+    # to report, by running the failed command again
+    if not _succeeds(argv):
+        result = subprocess.run(argv, capture_output=True)
+        raise subprocess.CalledProcessError(result.returncode, argv, result.stdout, result.stderr)
+
+async def _run_ffmpeg(argv, semaphore):
+    """Run a single ffmpeg invocation, returning (filename, ok, stderr)"""
+    async with semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if await process.wait() == 0:
+            return Path(argv[-1]).name, True, b""
+        # Run it again capturing stderr, as _run() does, to report the error
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        return Path(argv[-1]).name, False, stderr
+
+async def _run_ffmpeg_jobs(jobs):
+    """Run ffmpeg invocations concurrently, at most one per CPU at a time"""
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+    return await asyncio.gather(*(_run_ffmpeg(argv, semaphore) for argv in jobs))
+
+def hw_device_args(encoder):
+    """Global ffmpeg arguments needed to open the device for an encoder"""
+    if encoder == "h264_vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+@functools.lru_cache(maxsize=None)
+def detect_hw_encoder():
+    """Return the first usable H.264 encoder, preferring hardware encoders"""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, check=False)
+    available = {
+        fields[1] for fields in map(str.split, result.stdout.decode(errors="replace").splitlines())
+        if len(fields) > 1
+    }
+    for encoder in H264_ENCODERS[:-1]:
+        if encoder not in available:
+            continue
+        # Builds list hardware encoders even when the hardware is missing,
+        # so only pick one that can actually encode a few frames
+        probe_cmd = (
+            ["ffmpeg"] + hw_device_args(encoder) +
+            ["-f", "lavfi", "-i", "testsrc=duration=0.1:size=320x240:rate=10"] +
+            h264_args(["-codec:v", "libx264"], encoder) + ["-f", "null", "-"]
+        )
+        if _succeeds(probe_cmd):
+            return encoder
+    return "libx264"
+
+def h264_args(extra_args, encoder):
+    """Swap libx264 in extra_args for the given H.264 encoder"""
+    if "libx264" not in extra_args:
+        return extra_args
+    args = list(extra_args)
+    codec_index = args.index("libx264")
+    args[codec_index] = encoder
+    if encoder == "h264_nvenc":
+        args[codec_index + 1:codec_index + 1] = ["-preset", "p1", "-tune", "ll"]
+    elif encoder == "h264_vaapi":
+        # Frames must be scaled and converted in software before they are
+        # uploaded, so -s and -pix_fmt become filters ahead of hwupload
+        filters = ["format=nv12", "hwupload"]
+        if "-s" in args:
+            size_index = args.index("-s")
+            filters.insert(0, "scale=" + args[size_index + 1].replace("x", ":"))
+            del args[size_index:size_index + 2]
+        if "-pix_fmt" in args:
+            pix_fmt_index = args.index("-pix_fmt")
+            del args[pix_fmt_index:pix_fmt_index + 2]
+        args = ["-vf", ",".join(filters)] + args
+    return args
+
+def fast(extra_args):
+    """Add the fastest encoder settings after each codec selected in extra_args"""
+    args = list(extra_args)
+    for codec, speed_args in FAST_ENCODER_ARGS.items():
+        if codec in args:
+            codec_index = args.index(codec) + 1
+            args[codec_index:codec_index] = speed_args
+    return args
+
+def encode_outputs(base_cmd, outputs, output_dir, output_args=(), global_args=()):
+    """Encode all outputs of a lavfi source from a single ffmpeg process,
+    one process per file on failure
+
+    Returns the filenames that were generated and any warnings.
+    """
+    if not outputs:
+        return [], []
+    
+    # ffmpeg generates the lavfi source once and fans it out to every output,
+    # so each output only needs its own codec options followed by its path
+    lavfi_cmd = [base_cmd[0], *global_args, *base_cmd[1:]]
+    fused_cmd = list(lavfi_cmd)
+    for filename, extra_args in outputs:
+        fused_cmd += [*output_args, *extra_args, os.fspath(output_dir / filename)]
+    generated = []
+    warnings = []
+    try:
+        if _succeeds(fused_cmd):
+            generated = [filename for filename, _ in outputs]
+            return generated, warnings
+        
+        # A single unavailable codec aborts the whole fused run, so retry each
+        # output on its own. The encodes are independent, so run them side by
+        # side with THREADS_PER_JOB threads each to avoid oversubscribing the cores.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Render the source once so the retries only read back raw frames
+            # instead of each running the lavfi filter graph again
+            retry_cmd = lavfi_cmd
+            source_path = os.path.join(tmp_dir, "source.nut")
+            if len(outputs) > 1 and _succeeds(
+                [*lavfi_cmd, "-codec:v", "rawvideo", "-codec:a", "pcm_s16le", source_path]
+            ):
+                retry_cmd = ["ffmpeg", *global_args, "-i", source_path, "-y"]
+            
+            thread_args = ()
+            if len(outputs) > 1 and (os.cpu_count() or 1) > 1:
+                thread_args = ("-threads", str(THREADS_PER_JOB))
+            jobs = [
+                [*retry_cmd, *thread_args, *output_args, *extra_args, os.fspath(output_dir / filename)]
+                for filename, extra_args in outputs
+            ]
+            for filename, ok, stderr in asyncio.run(_run_ffmpeg_jobs(jobs)):
+                if ok:
+                    generated.append(filename)
+                else:
+                    reason = stderr.decode(errors="replace").strip().splitlines()[-1:]
+                    warnings.append(f"Could not generate {filename}: {' '.join(reason)}")
+        return generated, warnings
+    finally:
+        # Also reached on Ctrl-C, so no partial file survives to look up to date
+        discard_outputs(output_dir / filename for filename, _ in outputs if filename not in generated)
+
+def dedupe_outputs(outputs):
+    """Split outputs into those to encode and aliases of byte-identical ones
+
+    Returns the outputs to encode and a mapping from each encoded filename
+    to the filenames that can be linked to it.
+    """
+    unique = []
+    aliases = {}
+    sources = {}
+    for filename, extra_args in outputs:
+        # Without -f, ffmpeg picks the container from the file extension
+        args = list(extra_args)
+        container = Path(filename).suffix[1:]
+        if "-f" in args:
+            format_index = args.index("-f")
+            container = args[format_index + 1]
+            del args[format_index:format_index + 2]
+        key = (container, tuple(args))
+        if key in sources:
+            aliases[sources[key]].append(filename)
+        else:
+            sources[key] = filename
+            aliases[filename] = []
+            unique.append((filename, extra_args))
+    return unique, aliases
+
+def print_summary(generated, warnings):
+    """Print the generated files and warnings of one generator in a single write"""
+    lines = [f"Warning: {warning}" for warning in warnings]
+    if generated:
+        lines.insert(0, "Generated: " + ", ".join(generated))
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+def link_or_copy(src, dst):
+    """Hardlink dst to src, copying instead if the filesystem refuses links"""
+    dst.unlink(missing_ok=True)
     try:
-        result = subprocess.run([cmd, "--version"], capture_output=True, check=False)
-        # Command exists if we got any output (stdout or stderr) as indication it ran
-        return len(result.stdout) > 0 or len(result.stderr) > 0
-    except (FileNotFoundError, OSError):
-        return False
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
 
-def generate_audio_files():
+def generate_audio_files(force=False):
     """Generate example audio files using FFmpeg"""
     if not check_command("ffmpeg"):
         print("Warning: ffmpeg not found. Skipping audio file generation.")
         return
     
-    # Generate a simple sine wave tone for testing
-    # 2 seconds, 440Hz (A note), sample rate 44100
-    base_cmd = [
-        "ffmpeg", "-f", "lavfi",
-        "-i", "sine=frequency=440:duration=2",
-        "-y"  # Overwrite output files
-    ]
-    
     audio_files = [
         ("example.mp3", ["-codec:a", "libmp3lame", "-b:a", "128k"]),
         ("example.wav", ["-codec:a", "pcm_s16le"]),
@@ -65,64 +329,78 @@ def generate_audio_files():
         ("example.flac", ["-codec:a", "flac"]),
         ("example.m4a", ["-codec:a", "aac", "-b:a", "128k", "-f", "mp4"]),
         ("example.weba", ["-codec:a", "libopus", "-b:a", "128k", "-f", "webm"]),
+        # WMA may not be available on all systems
+        ("example.wma", ["-codec:a", "wmav2", "-b:a", "128k"]),
+    ]
+    audio_files = [
+        (filename, fast(extra_args)) for filename, extra_args in audio_files
+        if is_stale(AUDIO_DIR / filename, force)
     ]
     
-    # WMA requires special handling (may not be available on all systems)
-    try:
-        subprocess.run(
-            base_cmd + ["-codec:a", "wmav2", "-b:a", "128k"] + 
-            [str(AUDIO_DIR / "example.wma")],
-            capture_output=True, check=True
-        )
-        print("Generated example.wma")
-    except:
-        print("Warning: Could not generate WMA file (codec may not be available)")
+    generated = []
     
     # Generate MIDI file (simple approach - create a minimal MIDI)
-    midi_content = bytes([
-        0x4D, 0x54, 0x68, 0x64, 0x00, 0x00, 0x00, 0x06,  # MIDI header
-        0x00, 0x01, 0x00, 0x01, 0x00, 0x60,  # Format 1, 1 track, 96 ticks/quarter
-        0x4D, 0x54, 0x72, 0x6B, 0x00, 0x00, 0x00, 0x0B,  # Track header
-        0x00, 0xFF, 0x51, 0x03, 0x07, 0xA1, 0x20,  # Set tempo
-        0x00, 0x90, 0x3C, 0x60,  # Note on (middle C)
-        0x60, 0x80, 0x3C, 0x00,  # Note off
-        0x00, 0xFF, 0x2F, 0x00   # End of track
-    ])
-    (AUDIO_DIR / "example.mid").write_bytes(midi_content)
-    (AUDIO_DIR / "example.midi").write_bytes(midi_content)
-    (AUDIO_DIR / "example.kar").write_bytes(midi_content)
-    (AUDIO_DIR / "example.rmi").write_bytes(midi_content)
-    print("Generated MIDI files (example.mid, example.midi, example.kar, example.rmi)")
+    midi_files = ["example.mid", "example.midi", "example.kar", "example.rmi"]
+    if any(is_stale(AUDIO_DIR / filename, force) for filename in midi_files):
+        midi_path = AUDIO_DIR / midi_files[0]
+        midi_path.write_bytes(MIDI_CONTENT)
+        for filename in midi_files[1:]:
+            link_or_copy(midi_path, AUDIO_DIR / filename)
+        generated += midi_files
     
     # Generate other audio formats
-    for filename, extra_args in audio_files:
-        output_path = AUDIO_DIR / filename
+    encoded, warnings = encode_outputs(AUDIO_BASE_CMD, audio_files, AUDIO_DIR)
+    print_summary(generated + encoded, warnings)
+
+def encode_nvc_video(filenames, width=640, height=480, fps=30, duration=5):
+    """Encode a test pattern video with NVENC through PyNvVideoCodec
+
+    The H.264 stream is encoded once and muxed into each file. Returns the
+    filenames that were generated, which is empty if no CUDA device is usable
+    or the encode fails, leaving those files to ffmpeg.
+    """
+    # A diagonal luma ramp that moves every frame, with neutral chroma
+    ramp = (np.arange(width)[None, :] + np.arange(height)[:, None]).astype(np.uint8)
+    chroma = np.full((height // 2, width), 128, dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stream_path = os.path.join(tmp_dir, "example.h264")
         try:
-            subprocess.run(
-                base_cmd + extra_args + [str(output_path)],
-                capture_output=True, check=True
+            # Low-latency tuning avoids B-frames, so the raw stream muxes cleanly
+            encoder = nvc.CreateEncoder(
+                width, height, "NV12", True, codec="h264", preset="P1", tuning_info="low_latency"
             )
-            print(f"Generated {filename}")
-        except subprocess.CalledProcessError as e:
-            print(f"Warning: Could not generate {filename}: {e}")
+            with open(stream_path, "wb") as stream:
+                for frame in range(fps * duration):
+                    luma = ramp + np.uint8(frame * 4 & 0xFF)
+                    stream.write(bytearray(encoder.Encode(np.concatenate([luma, chroma]))))
+                stream.write(bytearray(encoder.EndEncode()))
+        except Exception:
+            return []
+        
+        remux_cmd = ["ffmpeg", "-f", "h264", "-framerate", str(fps), "-i", stream_path, "-y"]
+        for filename in filenames:
+            remux_cmd += ["-codec", "copy", "-f", NVC_VIDEO_FORMATS[filename], os.fspath(VIDEO_DIR / filename)]
+        remuxed = False
+        try:
+            _run(remux_cmd)
+            remuxed = True
+        except subprocess.CalledProcessError:
+            return []
+        finally:
+            if not remuxed:
+                discard_outputs(VIDEO_DIR / filename for filename in filenames)
+    return list(filenames)
 
-def generate_video_files():
+def generate_video_files(force=False):
     """Generate example video files using FFmpeg"""
     if not check_command("ffmpeg"):
         print("Warning: ffmpeg not found. Skipping video file generation.")
         return
     
-    # Generate a simple test pattern video (5 seconds, 640x480, 30fps)
-    base_cmd = [
-        "ffmpeg", "-f", "lavfi",
-        "-i", "testsrc=duration=5:size=640x480:rate=30",
-        "-y"
-    ]
-    
     video_files = [
         ("example.mp4", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p"]),
-        ("example.mp4v", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p"]),
-        ("example.mpg4", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p"]),
+        ("example.mp4v", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p", "-f", "mp4"]),
+        ("example.mpg4", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p", "-f", "mp4"]),
         ("example.webm", ["-codec:v", "libvpx-vp9", "-codec:a", "libopus"]),
         ("example.ogv", ["-codec:v", "libtheora", "-codec:a", "libvorbis"]),
         ("example.avi", ["-codec:v", "libx264", "-codec:a", "aac", "-f", "avi"]),
@@ -132,132 +410,99 @@ def generate_video_files():
         ("example.mpeg", ["-codec:v", "mpeg2video", "-codec:a", "mp2", "-f", "mpeg"]),
         ("example.mpg", ["-codec:v", "mpeg2video", "-codec:a", "mp2", "-f", "mpeg"]),
         ("example.mpe", ["-codec:v", "mpeg2video", "-codec:a", "mp2", "-f", "mpeg"]),
-        ("example.m1v", ["-codec:v", "mpeg2video", "-f", "mpeg1video"]),
+        ("example.m1v", ["-codec:v", "mpeg1video", "-f", "mpeg1video"]),
         ("example.m2v", ["-codec:v", "mpeg2video", "-f", "mpeg2video"]),
         ("example.mpa", ["-codec:a", "mp2", "-f", "mpeg"]),
         ("example.h264", ["-codec:v", "libx264", "-codec:a", "aac", "-pix_fmt", "yuv420p"]),
+        # 3GP/3G2 formats (mobile video)
+        ("example.3gp", ["-codec:v", "libx264", "-codec:a", "aac", "-s", "320x240", "-f", "3gp"]),
+        ("example.3g2", ["-codec:v", "libx264", "-codec:a", "aac", "-s", "320x240", "-f", "3g2"]),
+        ("example.flv", ["-codec:v", "libx264", "-codec:a", "aac", "-f", "flv"]),
     ]
     
-    # 3GP/3G2 formats (mobile video)
-    try:
-        subprocess.run(
-            base_cmd + ["-codec:v", "libx264", "-codec:a", "aac", "-s", "320x240", "-f", "3gp"] +
-            [str(VIDEO_DIR / "example.3gp")],
-            capture_output=True, check=True
-        )
-        print("Generated example.3gp")
-    except:
-        print("Warning: Could not generate 3GP file")
+    # Encode each distinct output only once, and only if it or an alias is stale
+    video_files, video_aliases = dedupe_outputs(video_files)
+    video_files = [
+        (filename, extra_args) for filename, extra_args in video_files
+        if any(is_stale(VIDEO_DIR / name, force) for name in [filename] + video_aliases[filename])
+    ]
+    if not video_files:
+        return
     
-    try:
-        subprocess.run(
-            base_cmd + ["-codec:v", "libx264", "-codec:a", "aac", "-s", "320x240", "-f", "3g2"] +
-            [str(VIDEO_DIR / "example.3g2")],
-            capture_output=True, check=True
-        )
-        print("Generated example.3g2")
-    except:
-        print("Warning: Could not generate 3G2 file")
+    # Aliases are hardlinks to their source, so unlink the whole group first;
+    # otherwise ffmpeg truncates the shared inode and a failed encode leaves
+    # partial aliases behind. They are relinked below once the source succeeds.
+    for filename, _ in video_files:
+        discard_outputs(VIDEO_DIR / name for name in [filename] + video_aliases[filename])
     
-    # FLV format
-    try:
-        subprocess.run(
-            base_cmd + ["-codec:v", "libx264", "-codec:a", "aac", "-f", "flv"] +
-            [str(VIDEO_DIR / "example.flv")],
-            capture_output=True, check=True
-        )
-        print("Generated example.flv")
-    except:
-        print("Warning: Could not generate FLV file")
+    # Drive NVENC directly for the common containers when PyNvVideoCodec is
+    # available, leaving everything else (and any failure) to ffmpeg
+    generated = []
+    if nvc is not None:
+        nvc_files = [filename for filename, _ in video_files if filename in NVC_VIDEO_FORMATS]
+        if nvc_files:
+            generated = encode_nvc_video(nvc_files)
+            video_files = [
+                (filename, extra_args) for filename, extra_args in video_files
+                if filename not in generated
+            ]
+    
+    # Use a hardware H.264 encoder in place of libx264 when one is available
+    h264_encoder = detect_hw_encoder()
+    video_files = [
+        (filename, fast(h264_args(extra_args, h264_encoder))) for filename, extra_args in video_files
+    ]
     
     # Generate other video formats
-    for filename, extra_args in video_files:
-        output_path = VIDEO_DIR / filename
-        try:
-            subprocess.run(
-                base_cmd + extra_args + [str(output_path)],
-                capture_output=True, check=True
-            )
-            print(f"Generated {filename}")
-        except subprocess.CalledProcessError as e:
-            print(f"Warning: Could not generate {filename}: {e}")
+    encoded, warnings = encode_outputs(
+        VIDEO_BASE_CMD, video_files, VIDEO_DIR, global_args=hw_device_args(h264_encoder)
+    )
+    generated += encoded
+    for source in list(generated):
+        for alias in video_aliases[source]:
+            link_or_copy(VIDEO_DIR / source, VIDEO_DIR / alias)
+            generated.append(alias)
+    print_summary(generated, warnings)
 
-def generate_compressed_files():
+def generate_compressed_files(force=False):
     """Generate compressed files"""
-    # Create a sample text file to compress
+    # Sample text to compress, archived under the name sample.txt
     sample_text = "This is a sample text file for compression testing. " * 50
-    sample_file = OTHER_DIR / "sample.txt"
-    sample_file.write_text(sample_text)
+    sample_data = sample_text.encode()
+    generated = []
     
     # Generate ZIP file
-    if check_command("zip"):
-        zip_path = OTHER_DIR / "example.zip"
-        # Change to OTHER_DIR to ensure relative paths work
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(OTHER_DIR)
-            subprocess.run(
-                ["zip", "-q", "example.zip", "sample.txt"],
-                check=True
-            )
-            print("Generated example.zip")
-        finally:
-            os.chdir(original_cwd)
-    else:
-        print("Warning: zip command not found")
+    zip_path = OTHER_DIR / "example.zip"
+    if is_stale(zip_path, force):
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("sample.txt", sample_data)
+        generated.append("example.zip")
     
     # Generate GZIP file
-    if check_command("gzip"):
-        gz_path = OTHER_DIR / "example.gz"
-        sample_file_gz = OTHER_DIR / "sample.txt"
-        subprocess.run(
-            ["cp", str(sample_file_gz), str(gz_path) + ".tmp"],
-            check=True
-        )
-        subprocess.run(
-            ["gzip", "-f", str(gz_path) + ".tmp"],
-            check=True
-        )
-        subprocess.run(
-            ["mv", str(gz_path) + ".tmp.gz", str(gz_path)],
-            check=True
-        )
-        print("Generated example.gz")
-        
-        # Generate TGZ (tar.gz)
-        if check_command("tar"):
-            tgz_path = OTHER_DIR / "example.tgz"
-            original_cwd = os.getcwd()
-            try:
-                os.chdir(OTHER_DIR)
-                subprocess.run(
-                    ["tar", "-czf", "example.tgz", "sample.txt"],
-                    check=True
-                )
-                print("Generated example.tgz")
-            finally:
-                os.chdir(original_cwd)
-    else:
-        print("Warning: gzip command not found")
+    gz_path = OTHER_DIR / "example.gz"
+    if is_stale(gz_path, force):
+        gz_path.write_bytes(gzip.compress(sample_data))
+        generated.append("example.gz")
     
-    # Clean up sample file
-    sample_file.unlink()
-
-def generate_image_files():
-    """Generate example image files using FFmpeg"""
-    if not check_command("ffmpeg"):
-        print("Warning: ffmpeg not found. Skipping image file generation.")
-        return
+    # Generate TGZ (tar.gz)
+    tgz_path = OTHER_DIR / "example.tgz"
+    if is_stale(tgz_path, force):
+        with tarfile.open(tgz_path, "w:gz") as tar_file:
+            info = tarfile.TarInfo("sample.txt")
+            info.size = len(sample_data)
+            info.mode = 0o644
+            info.mtime = int(time.time())
+            tar_file.addfile(info, io.BytesIO(sample_data))
+        generated.append("example.tgz")
     
-    # Generate a test pattern image (640x480, RGB)
+    print_summary(generated, [])
+
+def generate_ffmpeg_images(force=False):
+    """Generate example raster images using FFmpeg
+
+    Returns the filenames that were generated and any warnings.
+    """
     # We'll use FFmpeg to create a test pattern and convert to various formats
-    base_cmd = [
-        "ffmpeg", "-f", "lavfi",
-        "-i", "testsrc=duration=1:size=640x480:rate=1",
-        "-frames:v", "1",  # Only generate 1 frame
-        "-y"
-    ]
-    
     image_files = [
         ("example.png", ["-codec:v", "png"]),
         ("example.jpg", ["-codec:v", "mjpeg", "-q:v", "5"]),
@@ -269,54 +514,144 @@ def generate_image_files():
         ("example.tiff", ["-codec:v", "tiff"]),
         ("example.ico", ["-codec:v", "bmp", "-s", "32x32"]),  # ICO needs smaller size
     ]
+    image_files = [
+        (filename, extra_args) for filename, extra_args in image_files
+        if is_stale(IMAGES_DIR / filename, force)
+    ]
+    
+    generated = []
+    warnings = []
     
     # Generate APNG (animated PNG) - 2 frames
-    try:
-        subprocess.run(
-            ["ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=0.1:size=640x480:rate=10",
-             "-frames:v", "2", "-codec:v", "apng", "-y",
-             str(IMAGES_DIR / "example.apng")],
-            capture_output=True, check=True
-        )
-        print("Generated example.apng")
-    except:
-        print("Warning: Could not generate APNG file")
+    if is_stale(IMAGES_DIR / "example.apng", force):
+        try:
+            _run(
+                ["ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=0.1:size=640x480:rate=10",
+                 "-frames:v", "2", "-codec:v", "apng", "-y",
+                 str(IMAGES_DIR / "example.apng")]
+            )
+            generated.append("example.apng")
+        except subprocess.CalledProcessError:
+            warnings.append("Could not generate APNG file")
+        finally:
+            if "example.apng" not in generated:
+                discard_outputs([IMAGES_DIR / "example.apng"])
     
-    # Generate AVIF (requires libavif codec)
+    if is_stale(IMAGES_DIR / "example.avif", force):
+        if generate_ffmpeg_avif():
+            generated.append("example.avif")
+        else:
+            warnings.append("Could not generate AVIF file (codec may not be available)")
+    
+    # Generate other image formats
+    encoded, encode_warnings = encode_outputs(
+        IMAGE_BASE_CMD, image_files, IMAGES_DIR, output_args=["-frames:v", "1"]
+    )
+    return generated + encoded, warnings + encode_warnings
+
+def generate_ffmpeg_avif():
+    """Generate an example AVIF image using FFmpeg (requires libavif codec)
+
+    Returns whether the image was generated.
+    """
+    generated = False
     try:
-        subprocess.run(
-            base_cmd + ["-codec:v", "libavif", "-quality", "80"] +
-            [str(IMAGES_DIR / "example.avif")],
-            capture_output=True, check=True
+        _run(
+            [*IMAGE_BASE_CMD, "-frames:v", "1", "-codec:v", "libavif", "-quality", "80",
+             os.fspath(IMAGES_DIR / "example.avif")]
         )
-        print("Generated example.avif")
-    except:
-        print("Warning: Could not generate AVIF file (codec may not be available)")
+        generated = True
+    except subprocess.CalledProcessError:
+        pass
+    finally:
+        if not generated:
+            discard_outputs([IMAGES_DIR / "example.avif"])
+    return generated
+
+def build_test_pattern(width=640, height=480):
+    """Build an RGB test pattern image with Pillow"""
+    # Each channel is a diagonal ramp, so every row is the previous row
+    # shifted by one pixel and can be sliced out of a single ramp
+    channels = []
+    for shift in range(3):
+        ramp = bytes((i << shift) & 0xFF for i in range(width + height))
+        data = b"".join(ramp[row:row + width] for row in range(height))
+        channels.append(Image.frombytes("L", (width, height), data))
+    return Image.merge("RGB", channels)
+
+def build_bmp(width, height):
+    """Build a 24-bit BMP file of a diagonal gradient"""
+    # Rows are stored bottom-up, each padded to a multiple of 4 bytes
+    row_padding = bytes(-width * 3 % 4)
+    pixels = b"".join(
+        b"".join(bytes([(x + y) << 2 & 0xFF, (x + y) << 1 & 0xFF, (x + y) & 0xFF]) for x in range(width))
+        + row_padding
+        for y in reversed(range(height))
+    )
+    # BITMAPFILEHEADER (14 bytes) followed by BITMAPINFOHEADER (40 bytes)
+    file_header = struct.pack("<2sIHHI", b"BM", 54 + len(pixels), 0, 0, 54)
+    info_header = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0)
+    return file_header + info_header + pixels
+
+def generate_pillow_images(force=False):
+    """Generate example raster images in-process using Pillow
+
+    Returns the filenames that were generated and any warnings.
+    """
+    image = build_test_pattern()
+    generated = []
+    warnings = []
     
-    # Generate other image formats
-    for filename, extra_args in image_files:
-        output_path = IMAGES_DIR / filename
+    image_files = [
+        ("example.png", image, {"format": "PNG"}),
+        ("example.jpg", image, {"format": "JPEG", "quality": 80}),
+        ("example.jpeg", image, {"format": "JPEG", "quality": 80}),
+        ("example.bmp", image, {"format": "BMP"}),
+        ("example.gif", image, {"format": "GIF"}),
+        ("example.webp", image, {"format": "WEBP", "quality": 80}),
+        ("example.tif", image, {"format": "TIFF"}),
+        ("example.tiff", image, {"format": "TIFF"}),
+        # ICO needs smaller size
+        ("example.ico", image.resize((32, 32)), {"format": "ICO", "sizes": [(32, 32)]}),
+        # APNG (animated PNG) - 2 frames
+        ("example.apng", image, {
+            "format": "PNG", "save_all": True, "duration": 100,
+            "append_images": [image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)],
+        }),
+    ]
+    # AVIF requires Pillow to be built with libavif, otherwise try ffmpeg
+    if ".avif" in Image.registered_extensions():
+        image_files.append(("example.avif", image, {"format": "AVIF", "quality": 80}))
+    elif is_stale(IMAGES_DIR / "example.avif", force):
+        if check_command("ffmpeg") and generate_ffmpeg_avif():
+            generated.append("example.avif")
+        else:
+            warnings.append("Could not generate AVIF file (codec may not be available)")
+    
+    for filename, source, save_args in image_files:
+        if not is_stale(IMAGES_DIR / filename, force):
+            continue
         try:
-            subprocess.run(
-                base_cmd + extra_args + [str(output_path)],
-                capture_output=True, check=True
-            )
-            print(f"Generated {filename}")
-        except subprocess.CalledProcessError as e:
-            print(f"Warning: Could not generate {filename}: {e}")
+            source.save(IMAGES_DIR / filename, **save_args)
+            generated.append(filename)
+        except (KeyError, OSError, ValueError) as e:
+            discard_outputs([IMAGES_DIR / filename])
+            warnings.append(f"Could not generate {filename}: {e}")
+    return generated, warnings
+
+def generate_image_files(force=False):
+    """Generate example image files using Pillow, or FFmpeg without it"""
+    if Image is not None:
+        generated, warnings = generate_pillow_images(force)
+    elif check_command("ffmpeg"):
+        generated, warnings = generate_ffmpeg_images(force)
+    else:
+        generated, warnings = [], ["Pillow and ffmpeg not found. Skipping raster image generation."]
     
     # Generate .cur file (Windows cursor file - has special format)
     # Create a minimal valid .cur file (similar to .ico but with cursor hotspot)
-    try:
-        # First generate a small BMP for the cursor
-        subprocess.run(
-            ["ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=0.1:size=32x32:rate=1",
-             "-frames:v", "1", "-codec:v", "bmp", "-y",
-             str(IMAGES_DIR / "example_cur_temp.bmp")],
-            capture_output=True, check=True
-        )
-        # Read the BMP and create a .cur file with proper header
-        bmp_data = (IMAGES_DIR / "example_cur_temp.bmp").read_bytes()
+    if is_stale(IMAGES_DIR / "example.cur", force):
+        bmp_data = build_bmp(32, 32)
         # .cur file header: 2 bytes reserved, 2 bytes type (2=cursor), 2 bytes count
         # Then for each image: 1 byte width, 1 byte height, 1 byte colors, 1 byte reserved,
         # 2 bytes hotspot X, 2 bytes hotspot Y, 4 bytes size, 4 bytes offset
@@ -326,10 +661,7 @@ def generate_image_files():
                      bmp_size.to_bytes(4, 'little') +  # Size
                      (22).to_bytes(4, 'little'))  # Offset (6 header + 16 entry)
         (IMAGES_DIR / "example.cur").write_bytes(cur_header + cur_entry + bmp_data[14:])  # Skip BMP header
-        (IMAGES_DIR / "example_cur_temp.bmp").unlink()
-        print("Generated example.cur")
-    except Exception as e:
-        print(f"Warning: Could not generate .cur file: {e}")
+        generated.append("example.cur")
     
     # Generate SVG (text-based XML, so we write it directly)
     svg_content = '''<?xml version="1.0" encoding="UTF-8"?>
@@ -344,22 +676,24 @@ def generate_image_files():
   <circle cx="320" cy="240" r="100" fill="white" opacity="0.8"/>
   <text x="320" y="250" font-family="Arial" font-size="24" fill="black" text-anchor="middle">Example SVG</text>
 </svg>'''
-    (IMAGES_DIR / "example.svg").write_text(svg_content)
-    if check_command("gzip"):
-        (IMAGES_DIR / "example.svgz").write_bytes(
-            subprocess.run(
-                ["gzip", "-c"], input=svg_content.encode(), capture_output=True, check=True
-            ).stdout
-        )
-        print("Generated example.svgz")
-    print("Generated example.svg")
+    svg_data = svg_content.encode()
+    if is_stale(IMAGES_DIR / "example.svg", force):
+        (IMAGES_DIR / "example.svg").write_bytes(svg_data)
+        generated.append("example.svg")
+    if is_stale(IMAGES_DIR / "example.svgz", force):
+        (IMAGES_DIR / "example.svgz").write_bytes(gzip.compress(svg_data, compresslevel=9))
+        generated.append("example.svgz")
+    
+    print_summary(generated, warnings)
 
-def generate_other_files():
+def generate_other_files(force=False):
     """Generate other binary files"""
+    generated = []
+    
     # Generate a simple binary file
-    binary_content = bytes(range(256)) * 10  # 2560 bytes
-    (OTHER_DIR / "example.bin").write_bytes(binary_content)
-    print("Generated example.bin")
+    if is_stale(OTHER_DIR / "example.bin", force):
+        (OTHER_DIR / "example.bin").write_bytes(BINARY_CONTENT)
+        generated.append("example.bin")
     
     # Generate a simple PDF (minimal PDF structure)
     pdf_content = b"""%PDF-1.4
@@ -420,24 +754,35 @@ trailer
 startxref
 400
 %%EOF"""
-    (OTHER_DIR / "example.pdf").write_bytes(pdf_content)
-    print("Generated example.pdf")
+    if is_stale(OTHER_DIR / "example.pdf", force):
+        (OTHER_DIR / "example.pdf").write_bytes(pdf_content)
+        generated.append("example.pdf")
     
     # Generate a minimal WASM file (empty module)
-    wasm_content = bytes([
-        0x00, 0x61, 0x73, 0x6D,  # WASM magic number
-        0x01, 0x00, 0x00, 0x00,  # Version 1
-    ])
-    (OTHER_DIR / "example.wasm").write_bytes(wasm_content)
-    print("Generated example.wasm")
+    if is_stale(OTHER_DIR / "example.wasm", force):
+        (OTHER_DIR / "example.wasm").write_bytes(WASM_CONTENT)
+        generated.append("example.wasm")
     
     # Generate other binary formats (just create placeholder files)
-    for ext in [".dmg", ".iso", ".img"]:
-        # Create a small binary file
-        (OTHER_DIR / f"example{ext}").write_bytes(binary_content[:1024])
-        print(f"Generated example{ext}")
+    # They share the same content, so write it once and link the rest
+    placeholder_files = ["example.dmg", "example.iso", "example.img"]
+    if any(is_stale(OTHER_DIR / filename, force) for filename in placeholder_files):
+        placeholder_path = OTHER_DIR / placeholder_files[0]
+        placeholder_path.write_bytes(BINARY_CONTENT[:1024])
+        for filename in placeholder_files[1:]:
+            link_or_copy(placeholder_path, OTHER_DIR / filename)
+        generated += placeholder_files
+    
+    print_summary(generated, [])
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate example files for the ETL example project.")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="regenerate files even if they are newer than this script"
+    )
+    args = parser.parse_args()
+    
     print("Generating example files...")
     print("=" * 50)
     print(f"Project root: {PROJECT_ROOT}")
@@ -448,19 +793,19 @@ def main():
     print("=" * 50)
     
     print("\nGenerating audio files...")
-    generate_audio_files()
+    generate_audio_files(args.force)
     
     print("\nGenerating video files...")
-    generate_video_files()
+    generate_video_files(args.force)
     
     print("\nGenerating image files...")
-    generate_image_files()
+    generate_image_files(args.force)
     
     print("\nGenerating compressed files...")
-    generate_compressed_files()
+    generate_compressed_files(args.force)
     
     print("\nGenerating other binary files...")
-    generate_other_files()
+    generate_other_files(args.force)
     
     print("\n" + "=" * 50)
     print("File generation complete!")